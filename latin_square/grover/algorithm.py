@@ -4,26 +4,13 @@ Core Grover search loop for the Latin-square problem.
 This module provides:
   • implement_grover: append Grover iterations (oracle + phase-flip + diffuser).
 """
-from typing import List
 from qiskit import QuantumCircuit, QuantumRegister
+from qiskit.circuit.library import grover_operator
 
 from oracle.oracle import oracle
 from utils.indexer import Indexer
 
 
-def _diffuser(qc: QuantumCircuit, qubits: List[QuantumRegister]) -> None:
-    """
-    Apply the inversion-about-the-mean operator on the given data qubits.
-    """
-    qc.h(qubits)
-    qc.x(qubits)
-    qc.h(qubits[-1])
-    qc.mcx(qubits[:-1], qubits[-1])
-    qc.h(qubits[-1])
-    qc.x(qubits)
-    qc.h(qubits)
-
-
 def implement_grover(
     qc: QuantumCircuit,
     qr: QuantumRegister,
@@ -37,7 +24,15 @@ def implement_grover(
       1. Oracle call to mark valid solutions via phase inversion.
       2. Phase-flip on the global constraint flag qubit.
       3. Oracle uncomputation to restore ancillas.
-      4. Diffusion (_diffuser) on the data qubits to amplify amplitudes.
+      4. Diffusion on the blank data qubits to amplify amplitudes.
+
+    Steps 1-3 form the phase oracle handed to Qiskit's `grover_operator`,
+    which adds the diffusion over the blank qubits; its `iterations`-th
+    power is appended as a single gate. The oracle itself is constructed
+    once per circuit and reused for its own uncomputation.
+
+    With zero iterations or no blank cells (a fully pre-filled grid) the
+    circuit is left unchanged.
 
     Parameters:
         qc:         QuantumCircuit containing data + ancilla registers.
@@ -45,25 +40,37 @@ def implement_grover(
         idx:        Indexer for qubit mapping and metadata.
         iterations: Number of Grover iterations to apply.
     """
-    # Collect all blanck data-qubit indices in row-major order
-    data_blanck_qubits = [
-        qr[idx.data(i, j, b)]
-        for i in range(idx.n)
-        for j in range(idx.m)
-        if idx.grid[i][j] is None
-        for b in range(idx.k)
-    ]
+    # Collect all blanck data qubits in row-major order
+    data_blanck_qubits = list(idx.blank_qubits())
+    # Nothing to amplify: leave the initialized grid as it is
+    if iterations == 0 or not data_blanck_qubits:
+        return
+
     # Identify the global flag qubit
     global_flag = qr[idx.global_flag()]
 
-    for _ in range(iterations):
-        # 1) Apply the problem oracle
-        oracle(qc, qr, idx)
-        # 2) Phase-flip on the global flag qubit
-        qc.x(global_flag)
-        qc.z(global_flag)
-        qc.x(global_flag)
-        # 3) Uncompute the oracle to reset ancillas
-        oracle(qc, qr, idx)
-        # 4) Diffusion to amplify marked states
-        _diffuser(qc, data_blanck_qubits)
+    # Build the problem oracle once; it only XORs into the global flag, so
+    # the same gate both computes and uncomputes it
+    oracle_circ = QuantumCircuit(qr, name="oracle")
+    oracle(oracle_circ, qr, idx)
+    oracle_gate = oracle_circ.to_gate(label="Oracle")
+
+    # Build the phase oracle on a scratch circuit over the same register
+    phase_oracle = QuantumCircuit(qr, name="phase_oracle")
+    # 1) Apply the problem oracle
+    phase_oracle.append(oracle_gate, qr[:])
+    # 2) Phase-flip on the global flag qubit
+    phase_oracle.x(global_flag)
+    phase_oracle.z(global_flag)
+    phase_oracle.x(global_flag)
+    # 3) Uncompute the oracle to reset ancillas
+    phase_oracle.append(oracle_gate, qr[:])
+
+    # 4) Diffusion about the uniform superposition of the blank qubits
+    grover_op = grover_operator(
+        phase_oracle,
+        reflection_qubits=data_blanck_qubits,
+        insert_barriers=False,
+        name="grover_step",
+    )
+    qc.append(grover_op.power(iterations).to_gate(label="grover"), qr[:])
@@ -4,7 +4,6 @@ Circuit construction for the Grover-based Latin-square solver.
 This module provides:
   • create_circuit: build and initialize the quantum circuit for a given grid.
 """
-from math import ceil, log2
 from typing import List, Tuple
 
 from qiskit import QuantumCircuit, QuantumRegister
@@ -20,9 +19,9 @@ def create_circuit(
     Construct and initialize the quantum circuit for solving a partially filled Latin square.
 
     Steps:
-      1. Determine grid dimensions n (rows) and m (columns) and bit-width k = ceil(log2(max(n,m))).
+      1. Determine grid dimensions n (rows) and m (columns) and bit-width k = ceil(log2(max(n,m))) (at least 1).
       2. Validate the input grid structure and pre-filled values via verify_grid.
-      3. Compute the number of ancilla qubits needed to implement the cell-validity and uniqueness oracles.
+      3. Compute the number of ancilla qubits needed by the largest of the cell-validity and uniqueness oracles.
       4. Instantiate an Indexer for qubit indexing and metadata.
       5. Allocate a flat QuantumRegister of size idx.total_qubits.
       6. Load the pre-filled grid into data qubits (and apply Hadamard on empty cells).
@@ -38,16 +37,19 @@ def create_circuit(
     # 1) Grid dimensions and bit-width
     n = len(grid)
     m = len(grid[0]) if n > 0 else 0
-    k = max(1, int(ceil(log2(max(n, m)))))
+    k = max((max(n, m) - 1).bit_length(), 1)
 
     # 2) Validate grid pre-fills
     verify_grid(grid, max(n, m))
 
-    # 3) Estimate ancilla count for all sub-oracles
+    # 3) Size the ancilla pool for the largest sub-oracle; each one releases
+    #    its qubits before the next starts, and all of them take 2 clean
+    #    work qubits for their wide ORs when the pool has them
+    check_cells = max(n, m) < 1 << k    # otherwise every k-bit code is a valid symbol
     num_anc = max(
-        k + 2 + n + m,      # cell-validity: k+2 constant + n row-flags + m column-flags
-        k + 2*m + n - 1,    # row-uniqueness: k scratch + 2m window flags + n−1 row flags
-        k + 2*n + m - 1     # column-uniqueness: k scratch + 2n window flags + m−1 col flags
+        (k - 1) + m + n + 2 if check_cells else 0,  # cell-validity: k-1 comparator scratch + m cell flags + n row flags
+        n + (2*m - 1) + 2,  # row-uniqueness: n row flags + m+(m-1) pair flags (or m(m-1)/2 live ones when they fit)
+        m + (2*n - 1) + 2   # column-uniqueness: m column flags + n+(n-1) pair flags (or n(n-1)/2 live ones when they fit)
     )
 
     # 4) Create Indexer and registers
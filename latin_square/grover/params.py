@@ -1,7 +1,8 @@
 # grover/params.py
 
+from functools import lru_cache
 from typing import List, Optional
-from math import floor, pi, sqrt
+from math import floor, ldexp, pi, sqrt
 
 def count_blanks(grid: List[List[Optional[int]]]) -> int:
     """
@@ -28,8 +29,9 @@ def total_possibilities(
         Total number of basis states over all blank cells.
     """
     blanks = count_blanks(grid)
-    return 2 ** (blanks * bit_width)
+    return 1 << (blanks * bit_width)
 
+@lru_cache(maxsize=None)
 def optimal_grover_iterations(
     N: int,
     M: int
@@ -37,5 +39,59 @@ def optimal_grover_iterations(
     """
     Given search-space size N and known number of solutions M,
     return the standard Grover iteration count floor((π/4) * sqrt(N/M)).
+
+    N is split as mantissa * 2**(2*half) so that sqrt(N/M) is evaluated
+    without converting the (possibly huge) integer N/M to a float.
+    """
+    half = (N.bit_length() - 1) >> 1
+    mantissa = N / (1 << (2 * half))
+    return floor(ldexp((pi / 4) * sqrt(mantissa / M), half))
+
+def count_solutions(grid: List[List[Optional[int]]]) -> int:
+    """
+    Count the valid Latin-square completions of a partially filled grid.
+
+    Blank cells are filled in row-major order by backtracking over
+    per-row and per-column bitmasks of already-used symbols, so any
+    branch that repeats a symbol is pruned as soon as it appears.
+
+    Parameters:
+        grid: Partially filled grid with None for blanks and symbols
+              in [0..max(n,m)).
+
+    Returns:
+        Number of completions M with no repeated symbol in any row or column.
     """
-    return floor((pi / 4) * sqrt(N / M))
+    n = len(grid)
+    m = len(grid[0]) if n > 0 else 0
+    full = (1 << max(n, m)) - 1
+
+    # Symbols already used by the pre-filled cells
+    row_mask = [0] * n
+    col_mask = [0] * m
+    blanks = []
+    for i, row in enumerate(grid):
+        for j, v in enumerate(row):
+            if v is None:
+                blanks.append((i, j))
+            else:
+                row_mask[i] |= 1 << v
+                col_mask[j] |= 1 << v
+
+    def rec(pos: int) -> int:
+        if pos == len(blanks):
+            return 1
+        i, j = blanks[pos]
+        avail = full & ~row_mask[i] & ~col_mask[j]
+        total = 0
+        while avail:
+            bit = avail & -avail
+            row_mask[i] ^= bit
+            col_mask[j] ^= bit
+            total += rec(pos + 1)
+            row_mask[i] ^= bit
+            col_mask[j] ^= bit
+            avail ^= bit
+        return total
+
+    return rec(0)
@@ -3,43 +3,109 @@ Simulation and result processing for Grover-based Latin-square solver.
 
 This module provides:
   • simulate_counts: run an Aer simulation, measure all qubits, and return raw bitstring counts
+  • simulate_counts_batch: the same for several circuits in a single simulator job
   • extract_grid_counts: aggregate raw counts into grid-value counts
 """
-from typing import Dict, Tuple
+import os
+import warnings
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from qiskit import QuantumCircuit, QuantumRegister, transpile
 from qiskit_aer import AerSimulator
 
 from utils.indexer import Indexer
 
+# Widest circuit simulated with the dense statevector method; beyond this
+# the 2**n amplitudes no longer fit in memory on a typical machine
+STATEVECTOR_MAX_QUBITS = 26
+
 
 def simulate_counts(
     qc: QuantumCircuit,
     sim_type: str,
-    shots: int = 1024
+    shots: int = 1024,
+    optimization_level: int = 1,
+    max_bond_dimension: Optional[int] = None
 ) -> Dict[str, int]:
     """
     Execute the given circuit on AerSimulator, measuring all qubits.
 
     Parameters:
-        qc:        QuantumCircuit (should have measurements appended internally).
-        sim_type:  Simulation method (e.g. 'matrix_product_state').
-        shots:     Number of simulation shots.
+        qc:                 QuantumCircuit (should have measurements appended internally).
+        sim_type:           Simulation method (e.g. 'matrix_product_state').
+        shots:              Number of simulation shots.
+        optimization_level: Transpiler optimization level. Higher levels add little
+                            for a simulator without coupling map or noise model, so the
+                            default is 1 and gate fusion is left to Aer.
+        max_bond_dimension: Optional cap on the MPS bond dimension (approximate
+                            simulation); ignored by the other methods.
 
     Returns:
         Raw counts mapping bitstring keys to occurrence counts.
     """
-    # Copy circuit and ensure all qubits are measured
-    circ = qc.copy()
-    circ.measure_all()
+    return simulate_counts_batch([qc], sim_type, shots, optimization_level, max_bond_dimension)[0]
 
-    # Set up simulator and transpile
-    sim = AerSimulator(method=sim_type, enable_truncation=True)
-    tcirc = transpile(circ, sim, optimization_level=3)
 
-    # Run simulation and return raw counts
-    result = sim.run(tcirc, shots=shots).result()
-    return result.get_counts()
+def simulate_counts_batch(
+    circuits: List[QuantumCircuit],
+    sim_type: str,
+    shots: int = 1024,
+    optimization_level: int = 1,
+    max_bond_dimension: Optional[int] = None
+) -> List[Dict[str, int]]:
+    """
+    Execute several circuits in a single AerSimulator job, measuring all qubits.
+
+    All circuits are transpiled together and submitted in one sim.run call,
+    so the transpile and backend set-up cost is paid once and Aer can run
+    the experiments in parallel (e.g. when sweeping grids or iteration counts).
+
+    Parameters:
+        circuits:           QuantumCircuits to simulate (measurements are appended internally).
+        sim_type:           Simulation method (e.g. 'matrix_product_state').
+        shots:              Number of simulation shots per circuit.
+        optimization_level: Transpiler optimization level (see simulate_counts).
+        max_bond_dimension: Optional MPS bond-dimension cap (see simulate_counts).
+
+    Returns:
+        Raw counts for each circuit, in the same order as `circuits`.
+    """
+    # Fall back to MPS when a dense statevector would not fit in memory
+    num_qubits = max(qc.num_qubits for qc in circuits)
+    if sim_type == "statevector" and num_qubits > STATEVECTOR_MAX_QUBITS:
+        warnings.warn(
+            f"{num_qubits} qubits exceed the statevector limit of "
+            f"{STATEVECTOR_MAX_QUBITS}; using 'matrix_product_state' instead"
+        )
+        sim_type = "matrix_product_state"
+
+    # Copy circuits and ensure all qubits are measured
+    circs = []
+    for qc in circuits:
+        circ = qc.copy()
+        circ.measure_all()
+        circs.append(circ)
+
+    # Set up simulator (with Aer's own gate fusion) and transpile
+    sim = AerSimulator(
+        method=sim_type,
+        enable_truncation=True,
+        fusion_enable=True,
+        fusion_threshold=5,
+        max_parallel_threads=os.cpu_count() or 0,
+        max_parallel_experiments=len(circs),
+    )
+    if sim_type == "matrix_product_state":
+        sim.set_options(mps_sample_measure_algorithm="mps_probabilities")
+        if max_bond_dimension is not None:
+            sim.set_options(matrix_product_state_max_bond_dimension=max_bond_dimension)
+    tcircs = transpile(circs, sim, optimization_level=optimization_level)
+
+    # Run all experiments in one job and return raw counts per circuit
+    result = sim.run(tcircs, shots=shots).result()
+    return [result.get_counts(i) for i in range(len(circs))]
 
 
 def extract_grid_counts(
@@ -57,22 +123,35 @@ def extract_grid_counts(
         Mapping from flat grid-value tuples to aggregated counts.
     """
     n, m, k = idx.n, idx.m, idx.k
-    aggregated: Dict[Tuple[int, ...], int] = {}
-
-    for bitstr, cnt in raw_counts.items():
-        # Reverse bitstring to have index match qubit index
-        bits = list(map(int, bitstr[::-1]))
-
-        # Reconstruct flat grid values
-        flat = []
-        for i in range(n):
-            for j in range(m):
-                v = 0
-                for b in range(k):
-                    v |= bits[idx.data(i, j, b)] << b
-                flat.append(v)
-
-        key = tuple(flat)
-        aggregated[key] = aggregated.get(key, 0) + cnt
-
-    return aggregated
+    if not raw_counts:
+        return {}
+
+    # Qubit index of every data bit, shape (n*m, k) in row-major cell order
+    cols = np.array(idx.data_qubits(), dtype=np.intp).reshape(n * m, k)
+
+    keys = list(raw_counts)
+    counts = np.fromiter(raw_counts.values(), dtype=np.int64, count=len(keys))
+
+    if len(keys[0]) <= 64:
+        # Compact circuits: parse each key as one uint64 (bit q = qubit q) and
+        # slice every cell out with a single shift/mask
+        keys_arr = np.fromiter((int(key, 2) for key in keys), dtype=np.uint64, count=len(keys))
+        shifts = cols[:, 0].astype(np.uint64)
+        mask = np.uint64((1 << k) - 1)
+        values = (keys_arr[:, None] >> shifts[None, :]) & mask
+    else:
+        # Stack all bitstrings into a (num_keys, num_qubits) 0/1 matrix as-is;
+        # keys are MSB first, so qubit q sits in column (num_qubits - 1 - q)
+        joined = "".join(keys).encode("ascii")
+        bitmat = (np.frombuffer(joined, dtype=np.uint8) - ord("0")).reshape(len(keys), -1)
+        cols = (bitmat.shape[1] - 1) - cols
+
+        # Gather the data bits of each cell and weight them by 2**b
+        weights = 1 << np.arange(k, dtype=np.int64)
+        values = (bitmat[:, cols] * weights).sum(axis=-1)
+
+    aggregated: Counter = Counter()
+    for key, cnt in zip(map(tuple, values.tolist()), counts.tolist()):
+        aggregated[key] += cnt
+
+    return dict(aggregated)
@@ -1,5 +1,6 @@
 # oracle/__init__.py
 from .cell_validity import *
+from .pair_flags import *
 from .column_uniqueness import *
 from .row_uniqueness import *
 from .oracle import *
@@ -1,6 +1,4 @@
-import sys, os
-sys.path.append(os.path.dirname(os.getcwd()))
-from utils.helpers import comparator_less, prepare_ancilla_cell_validity
+from utils.helpers import comparator_geq_const, or_into
 from utils.indexer import Indexer
 
 from qiskit import QuantumCircuit, QuantumRegister
@@ -15,11 +13,22 @@ def cell_validity_circuit(
     """
     Check each cell against a threshold and flag if any value exceeds it.
     Processes the grid row by row:
-      1. Prepare constant ancillas for comparison (2**k - threshold_n).
-      2. For each row, compare each of its m cells to the threshold, recording results in cell_flags.
-      3. Aggregate per-cell flags into a per-row flag if any cell in the row is above the threshold.
-      4. Combine all per-row flags into the final validity flag.
-    All ancillas are restored to |0> when complete.
+      1. For each row, compare each of its blank cells to the threshold, recording results in cell_flags.
+      2. Aggregate per-cell flags into a per-row flag if any cell in the row is above the threshold.
+      3. Combine all per-row flags into the final validity flag.
+    Steps 1-2 are recorded once as a sub-circuit; after step 3 its inverse
+    is applied, restoring all ancillas to |0> when complete.
+
+    The threshold is compiled into a cached two's-complement comparator
+    (`comparator_geq_const`), which needs k-1 clean scratch qubits and no
+    prepared constant register.
+
+    Pre-filled cells are classical constants and are checked at build time:
+    an out-of-range fixed value sets its row flag with a single X, and rows
+    without blanks or invalid fixed values are left out entirely.
+
+    When the ancilla pool has spare qubits, the row and grid ORs borrow up to
+    two of them as clean work qubits for a linear-CX MCX synthesis.
 
     Parameters:
         qc:           The QuantumCircuit to modify.
@@ -31,57 +40,71 @@ def cell_validity_circuit(
     n = idx.n             # number of rows
     m = idx.m             # number of columns
 
-    # Reserve ancillas: k for comparator plus 2 for threshold constant storage
-    const_ancilla_inds = idx.reserve_ancilla(k + 2)
-    const_ancilla = [qr[i] for i in const_ancilla_inds]
-
-    # Per-cell comparison flags for each row
-    cell_flag_inds = idx.reserve_ancilla(m)
+    # Blank columns of each row, and rows holding an out-of-range fixed value
+    blank_cols = [[j for j in range(m) if idx.grid[i][j] is None] for i in range(n)]
+    fixed_invalid = [
+        any(v is not None and v >= threshold_n for v in idx.grid[i]) for i in range(n)
+    ]
+    # Only these rows can raise their flag; the others are constant |0>
+    rows = [i for i in range(n) if blank_cols[i] or fixed_invalid[i]]
+    if not rows:
+        return
+    width = max(len(blank_cols[i]) for i in rows)
+
+    # Reserve the comparator's k-1 clean scratch qubits
+    cmp_ancilla_inds = idx.reserve_ancilla(k - 1 if width else 0)
+    cmp_ancilla = [qr[i] for i in cmp_ancilla_inds]
+
+    # Per-cell comparison flags for the blank cells of a row
+    cell_flag_inds = idx.reserve_ancilla(width)
     cell_flags = [qr[i] for i in cell_flag_inds]
 
     # Per-row aggregation flags
-    row_flag_inds = idx.reserve_ancilla(n)
+    row_flag_inds = idx.reserve_ancilla(len(rows))
     row_flags = [qr[i] for i in row_flag_inds]
 
+    # Clean work qubits for the wide ORs, borrowed only if the pool has room
+    work_inds = idx.reserve_ancilla(min(2, idx.free_ancilla())) if max(width, len(rows)) > 2 else []
+    work = [qr[i] for i in work_inds]
+
     # Final validity flag for the entire grid
     validity_flag = qr[idx.cell_valid_flag()]
 
-    # Initialize ancillas to represent (2**k - threshold_n)
-    prepare_ancilla_cell_validity(qc, const_ancilla, threshold_n, k)
+    # Data qubits of every cell, looked up once for both comparator passes
+    cell_qubits = idx.cell_qubit_table()
+    cells = [[[qr[q] for q in cell_qubits[i][j]] for j in range(m)] for i in range(n)]
+
+    # Record the per-row sweep once on a sub-circuit over the same register
+    inner = QuantumCircuit(qr, name="cell_validity_rows")
 
-    # Process each row in the grid
-    for i in range(n):
-        # Compare each cell in row i to the threshold
-        for j in range(m):
-            data_qubits = [qr[q] for q in idx.cell_qubits(i, j)]
-            comparator_less(qc, data_qubits, const_ancilla, cell_flags[j], k)
+    # Process each row that can be invalid
+    for row_flag, i in zip(row_flags, rows):
+        # A fixed out-of-range value makes the row invalid regardless of the blanks
+        if fixed_invalid[i]:
+            inner.x(row_flag)
+            continue
+
+        flags = cell_flags[:len(blank_cols[i])]
+
+        # Compare each blank cell in row i to the threshold
+        for flag, j in zip(flags, blank_cols[i]):
+            comparator_geq_const(inner, cells[i][j], threshold_n, flag, cmp_ancilla, k)
 
         # If any cell flag is set, mark the entire row
-        qc.mcx(cell_flags, row_flags[i], ctrl_state='0'*m)
-        qc.x(row_flags[i])
+        or_into(inner, flags, row_flag, work)
 
         # Uncompute cell comparison flags for this row
-        for j in reversed(range(m)):
-            data_qubits = [qr[q] for q in idx.cell_qubits(i, j)]
-            comparator_less(qc, data_qubits, const_ancilla, cell_flags[j], k)
-
-    # Combine all row flags into the final validity flag
-    qc.mcx(row_flags, validity_flag, ctrl_state='0'*n)
-    qc.x(validity_flag)
-
-    # Restore per-row flags to |0> by recomputing and uncomputing
-    for i in range(n):
-        for j in range(m):
-            data_qubits = [qr[q] for q in idx.cell_qubits(i, j)]
-            comparator_less(qc, data_qubits, const_ancilla, cell_flags[j], k)
-        qc.mcx(cell_flags, row_flags[i], ctrl_state='0'*m)
-        qc.x(row_flags[i])
-        for j in reversed(range(m)):
-            data_qubits = [qr[q] for q in idx.cell_qubits(i, j)]
-            comparator_less(qc, data_qubits, const_ancilla, cell_flags[j], k)
-
-    # Restore constant ancillas
-    prepare_ancilla_cell_validity(qc, const_ancilla, threshold_n, k)
+        for flag, j in reversed(list(zip(flags, blank_cols[i]))):
+            comparator_geq_const(inner, cells[i][j], threshold_n, flag, cmp_ancilla, k)
+
+    qc.compose(inner, qubits=qr[:], inplace=True, copy=False)
+
+    # Combine all row flags into the final validity flag (the per-cell
+    # flags are back in |0> and serve as clean work qubits)
+    or_into(qc, row_flags, validity_flag, work + cell_flags)
+
+    # Restore per-row flags by undoing the sweep
+    qc.compose(inner.inverse(), qubits=qr[:], inplace=True, copy=False)
 
     # Release all ancillas
-    idx.release_ancilla(const_ancilla_inds + cell_flag_inds + row_flag_inds)
+    idx.release_ancillas(cmp_ancilla_inds + cell_flag_inds + row_flag_inds + work_inds)
@@ -1,9 +1,8 @@
-import sys, os
-sys.path.append(os.path.dirname(os.getcwd()))
-from utils.helpers import comparator_equal
+from utils.helpers import or_into
 from utils.indexer import Indexer
+from oracle.pair_flags import line_pair_flags
 
-from math import ceil, log2
+from typing import Optional, Sequence
 from qiskit import QuantumCircuit, QuantumRegister
 from qiskit.circuit import Qubit
 
@@ -16,7 +15,8 @@ def column_pair_flags(
     flag2: QuantumRegister,
     cflag: Qubit,
     idx: Indexer,
-    col: int
+    col: int,
+    pair_flags: Optional[Sequence[Qubit]] = None
 ):
     """
     For a single column `col`, compare every pair of rows (r1 < r2).
@@ -26,64 +26,35 @@ def column_pair_flags(
     Parameters:
         qc:     The QuantumCircuit to modify.
         data:   QuantumRegister holding the grid data (n * m * k qubits).
-        anc:    QuantumRegister providing k scratch qubits for XNOR operations.
+        anc:    Clean work qubits for the ORs (up to two are used; may be empty).
         flag1:  QuantumRegister of length n for per-row OR results.
         flag2:  QuantumRegister of length n-1 for per-pair equality flags.
         cflag:  Single-qubit flag for any equality violation in this column.
         idx:    Indexer instance for qubit indexing and metadata.
         col:    Column index to check.
-    """
-    n, m, k = idx.n, idx.m, idx.k
+        pair_flags: Optional n*(n-1)/2 clean qubits. If given, all pair equalities
+                    are kept live at once and OR-ed straight into `cflag`, so each pair is
+                    compared twice instead of four times; flag1/flag2 are then unused.
 
-    # Validate ancilla register sizes
-    if len(anc) < k:
-        raise ValueError(f"anc register must have at least {k} qubits for scratch")
-    if len(flag1) < n:
-        raise ValueError(f"flag1 register must have at least {n} qubits for row flags")
-    if len(flag2) < n-1:
-        raise ValueError(f"flag2 register must have at least {n-1} qubits for pair flags")
-
-    # Compute equality flags for each row pair
-    for r1 in range(n-1):
-        for r2 in range(r1+1, n):
-            # Extract k-bit cell values for rows r1 and r2
-            q1 = [data[idx.data(r1, col, b)] for b in range(k)]
-            q2 = [data[idx.data(r2, col, b)] for b in range(k)]
-            # Flip flag2[r2-1] if q1 == q2
-            comparator_equal(qc, q1, q2, anc, flag2[r2-1], k)
-
-        # OR the pair-wise flags into a row-level flag
-        qc.mcx(flag2, flag1[r1], ctrl_state='0'*(n-1))  # multi-control on all zeros
-        qc.x(flag1[r1])  # invert to record if any equality occurred
-
-        # Uncompute pair flags to reset ancillas
-        for r2 in range(r1+1, n):
-            q1 = [data[idx.data(r1, col, b)] for b in range(k)]
-            q2 = [data[idx.data(r2, col, b)] for b in range(k)]
-            comparator_equal(qc, q1, q2, anc, flag2[r2-1], k)
-
-    # OR all row-level flags into the column-level violation flag
-    qc.mcx(flag1, cflag, ctrl_state='0'*n)
-    qc.x(cflag)
-
-    # Final cleanup: uncompute all intermediate flags
-    for r1 in range(n-1):
-        for r2 in range(r1+1, n):
-            q1 = [data[idx.data(r1, col, b)] for b in range(k)]
-            q2 = [data[idx.data(r2, col, b)] for b in range(k)]
-            comparator_equal(qc, q1, q2, anc, flag2[r2-1], k)
-        qc.mcx(flag2, flag1[r1], ctrl_state='0'*(n-1))
-        qc.x(flag1[r1])
-        for r2 in range(r1+1, n):
-            q1 = [data[idx.data(r1, col, b)] for b in range(k)]
-            q2 = [data[idx.data(r2, col, b)] for b in range(k)]
-            comparator_equal(qc, q1, q2, anc, flag2[r2-1], k)
+    Pre-filled cells are classical constants and are folded in at build time:
+    two fixed cells are compared classically (equal sets the pair flag with an X,
+    different drops the pair), and a fixed cell against a blank one is compared
+    against the fixed value's bits without touching the fixed cell's qubits.
+
+    Delegates to `line_pair_flags` on the cells of column `col`.
+    """
+    n, k = idx.n, idx.k
+    cell_qubits = idx.cell_qubit_table()
+    cells = [[data[q] for q in cell_qubits[r][col]] for r in range(n)]
+    fixed = [idx.grid[r][col] for r in range(n)]
+    line_pair_flags(qc, cells, anc, flag1, flag2, cflag, k, fixed, pair_flags)
 
 
 def column_uniqueness_circuit(
     qc: QuantumCircuit,
     qr: QuantumRegister,
-    idx: Indexer
+    idx: Indexer,
+    parallel_columns: bool = False
 ):
     """
     Appends column-uniqueness checks:
@@ -97,39 +68,57 @@ def column_uniqueness_circuit(
         qc:  QuantumCircuit to extend.
         qr:  Combined data and ancilla QuantumRegister.
         idx: Indexer for qubit allocation and grid dimensions (n, m, k).
+        parallel_columns: If True and the pool can hold them, give every column its
+                          own bank of pair flags and work qubits. The column sweeps then
+                          act on disjoint qubits and overlap in depth, at m times the
+                          ancilla cost.
     """
     n, m, k = idx.n, idx.m, idx.k
 
     # Reserve ancillas and flags from the Indexer
-    comp_anc_inds = idx.reserve_ancilla(k)
-    comp_anc = [qr[i] for i in comp_anc_inds]
-
-    flag1_inds = idx.reserve_ancilla(n)
-    flag1 = [qr[i] for i in flag1_inds]
-
-    flag2_inds = idx.reserve_ancilla(n-1)
-    flag2 = [qr[i] for i in flag2_inds]
-
     col_flag_inds = idx.reserve_ancilla(m)
     col_flags = [qr[i] for i in col_flag_inds]
 
+    # Keep all pair flags live if the pool has room, or fall back to
+    # the flag1/flag2 scheme, which recomputes the pairs to save ancillas
+    num_pairs = n*(n-1)//2
+    live_pairs = idx.free_ancilla() >= num_pairs
+    bank_size = num_pairs if live_pairs else 2*n - 1
+
+    # One bank shared by all columns, or one per column when asked for and affordable
+    num_banks = m if parallel_columns and idx.free_ancilla() >= m*bank_size else 1
+    pair_flag_inds = [idx.reserve_ancilla(num_pairs) if live_pairs else [] for _ in range(num_banks)]
+    flag1_inds = [[] if live_pairs else idx.reserve_ancilla(n) for _ in range(num_banks)]
+    flag2_inds = [[] if live_pairs else idx.reserve_ancilla(n-1) for _ in range(num_banks)]
+    pair_flags = [[qr[i] for i in inds] if live_pairs else None for inds in pair_flag_inds]
+    flag1 = [[qr[i] for i in inds] for inds in flag1_inds]
+    flag2 = [[qr[i] for i in inds] for inds in flag2_inds]
+
+    # Clean work qubits for the ORs of each bank, if any are left in the pool
+    work_inds = [idx.reserve_ancilla(min(2, idx.free_ancilla())) for _ in range(num_banks)]
+    work = [[qr[i] for i in inds] for inds in work_inds]
+
     final_flag = qr[idx.col_flag()]
 
     # First pass: compute each per-column violation flag
     for j in range(m):
+        b = j % num_banks
         column_pair_flags(
-            qc, qr, comp_anc, flag1, flag2, col_flags[j], idx, j
+            qc, qr, work[b], flag1[b], flag2[b], col_flags[j], idx, j, pair_flags[b]
         )
 
-    # Aggregate per-column flags into the final flag
-    qc.mcx(col_flags, final_flag, ctrl_state='0'*m)
-    qc.x(final_flag)
+    # Aggregate per-column flags into the final flag; every other
+    # reserved qubit is back in |0> here and can serve as a clean work qubit
+    all_work_inds = sum(work_inds, [])
+    bank_inds = sum(pair_flag_inds + flag1_inds + flag2_inds, [])
+    or_into(qc, col_flags, final_flag, [qr[i] for i in all_work_inds + bank_inds])
 
     # Second pass: uncompute per-column flags to release ancillas
     for j in range(m):
+        b = j % num_banks
         column_pair_flags(
-            qc, qr, comp_anc, flag1, flag2, col_flags[j], idx, j
+            qc, qr, work[b], flag1[b], flag2[b], col_flags[j], idx, j, pair_flags[b]
         )
 
     # Release all borrowed ancillas
-    idx.release_ancilla(comp_anc_inds + flag1_inds + flag2_inds + col_flag_inds)
+    idx.release_ancillas(all_work_inds + col_flag_inds + bank_inds)
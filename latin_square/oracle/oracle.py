@@ -1,7 +1,5 @@
-import sys, os
-sys.path.append(os.path.dirname(os.getcwd()))
-
 from qiskit import QuantumCircuit, QuantumRegister
+from utils.helpers import or_into
 from utils.indexer import Indexer
 from oracle.row_uniqueness import row_uniqueness_circuit
 from oracle.column_uniqueness import column_uniqueness_circuit
@@ -22,25 +20,36 @@ def oracle(
 
     All ancillas are borrowed and released inside the sub-circuits, and all
     intermediate flags are uncomputed at the end, leaving only the global flag.
+    The sub-circuits draw from the same Indexer pool, so the ancillas one of
+    them returns are reused by the next and serve as clean work qubits for
+    the global OR.
+
+    When max(n, m) is a power of two, every k-bit code is a valid symbol, so
+    the cell-validity check is skipped and its flag stays |0>.
     """
+    symbols = max(idx.n, idx.m)
+    check_cells = symbols < 1 << idx.k
+
     # --- 1) Compute each constraint flag ---
-    cell_validity_circuit(qc, qr, idx, max(idx.n, idx.m))
+    if check_cells:
+        cell_validity_circuit(qc, qr, idx, symbols)
     row_uniqueness_circuit(qc, qr, idx)
     column_uniqueness_circuit(qc, qr, idx)
 
 
     # --- 2) Collapse into the single global flag ---
-    controls = [
-        qr[idx.cell_valid_flag()],
-        qr[idx.row_flag()],
-        qr[idx.col_flag()],
-    ]
+    controls = [qr[idx.row_flag()], qr[idx.col_flag()]]
+    if check_cells:
+        controls.append(qr[idx.cell_valid_flag()])
     global_q = qr[idx.global_flag()]
-    ctrl_state = '0' * len(controls)
-    qc.mcx(controls, global_q, ctrl_state=ctrl_state)
-    qc.x(global_q)
+    # Every sub-oracle has released its ancillas in |0>, so the pool can
+    # lend clean work qubits to this OR
+    work_inds = idx.reserve_ancilla(min(2, idx.free_ancilla()))
+    or_into(qc, controls, global_q, [qr[i] for i in work_inds])
+    idx.release_ancillas(work_inds)
 
     # --- 3) Uncompute the sub-oracles ---
     column_uniqueness_circuit(qc, qr, idx)
     row_uniqueness_circuit(qc, qr, idx)
-    cell_validity_circuit(qc, qr, idx, max(idx.n, idx.m))
+    if check_cells:
+        cell_validity_circuit(qc, qr, idx, symbols)
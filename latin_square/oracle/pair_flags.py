@@ -0,0 +1,149 @@
+from utils.helpers import comparator_equal, comparator_equal_const, or_into
+
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+from qiskit import QuantumCircuit
+from qiskit.circuit import Qubit
+
+
+def line_pair_flags(
+    qc: QuantumCircuit,
+    cells: Sequence[Sequence[Qubit]],
+    anc: Sequence[Qubit],
+    flag1: Sequence[Qubit],
+    flag2: Sequence[Qubit],
+    line_flag: Qubit,
+    k: int,
+    fixed: Optional[Sequence[Optional[int]]] = None,
+    pair_flags: Optional[Sequence[Qubit]] = None
+):
+    """
+    For a single line of cells (a row or a column), compare every pair of
+    cells (a < b). If any two cells are equal, flip the violation flag `line_flag`.
+    Leaves all ancilla and data qubits restored to their original state.
+
+    Parameters:
+        qc:         The QuantumCircuit to modify.
+        cells:      The k-qubit register of every cell of the line, in line order.
+        anc:        Clean work qubits for the ORs (up to two are used; may be empty).
+        flag1:      len(cells) qubits for the per-cell OR results.
+        flag2:      len(cells)-1 qubits for the per-pair equality flags.
+        line_flag:  Single-qubit flag for any equality violation in this line.
+        k:          Bit-width of a cell.
+        fixed:      Optional classical value of every cell (None for blanks).
+        pair_flags: Optional L*(L-1)/2 clean qubits for a line of L cells. If given,
+                    all pair equalities are kept live at once and OR-ed straight into
+                    `line_flag`, so each pair is compared twice instead of four times;
+                    flag1/flag2 are then unused.
+
+    Fixed cells are classical constants and are folded in at build time:
+    two fixed cells are compared classically (equal sets the pair flag with an X,
+    different drops the pair), and a fixed cell against a blank one is compared
+    against the fixed value's bits without touching the fixed cell's qubits.
+
+    The compute sweep and its inverse come from `_line_sweep`, which builds them
+    once per line shape and maps them onto each line's qubits.
+    """
+    num_cells = len(cells)
+    num_pairs = num_cells*(num_cells-1)//2
+
+    if pair_flags is not None:
+        if len(pair_flags) < num_pairs:
+            raise ValueError(f"pair_flags must have at least {num_pairs} qubits")
+        flags = list(pair_flags[:num_pairs])
+    else:
+        # Validate ancilla register sizes
+        if len(flag1) < num_cells:
+            raise ValueError(f"flag1 register must have at least {num_cells} qubits for cell flags")
+        if len(flag2) < num_cells-1:
+            raise ValueError(f"flag2 register must have at least {num_cells-1} qubits for pair flags")
+        flags = list(flag1[:num_cells]) + list(flag2[:num_cells-1])
+
+    fixed = tuple(fixed) if fixed is not None else (None,) * num_cells
+    template = _line_sweep(num_cells, k, fixed, pair_flags is not None, len(anc))
+    if template is None:
+        return  # no two cells of this line can repeat
+    sweep, unsweep, num_line_flags = template
+
+    # Map the template onto this line's cells, the work qubits and the flags
+    qubits = [q for cell in cells for q in cell[:k]] + list(anc) + flags
+    qc.compose(sweep, qubits, inplace=True, copy=False)
+
+    # Any set flag marks the line
+    or_into(qc, flags[:num_line_flags], line_flag, anc)
+
+    # Final cleanup: undo the sweep
+    qc.compose(unsweep, qubits, inplace=True, copy=False)
+
+
+@lru_cache(maxsize=None)
+def _line_sweep(
+    num_cells: int,
+    k: int,
+    fixed: Tuple[Optional[int], ...],
+    live_pairs: bool,
+    num_anc: int
+) -> Optional[Tuple[QuantumCircuit, QuantumCircuit, int]]:
+    """
+    Build the compute sweep of `line_pair_flags` once per line length,
+    pattern of fixed values, flag scheme and number of work qubits.
+
+    The sweep acts on [num_cells*k cell qubits | num_anc work qubits | flags],
+    where the flags are L*(L-1)/2 pair flags if `live_pairs`, else flag1 (L)
+    followed by flag2 (L-1), for L = num_cells. Returns the sweep, its inverse
+    and how many leading flags hold the result to OR into the line flag, or
+    None if no two cells of the line can be equal.
+    """
+    L = num_cells
+    num_flags = L*(L-1)//2 if live_pairs else 2*L - 1
+    sweep = QuantumCircuit(L*k + num_anc + num_flags, name="pairs")
+    cells = [sweep.qubits[a*k:(a+1)*k] for a in range(L)]
+    anc = sweep.qubits[L*k:L*k + num_anc]
+    flags = sweep.qubits[L*k + num_anc:]
+
+    def can_repeat(a: int, b: int) -> bool:
+        # Two fixed cells with different values can never be equal
+        return fixed[a] is None or fixed[b] is None or fixed[a] == fixed[b]
+
+    def pair_equal(a: int, b: int, flag: Qubit) -> None:
+        # Flip `flag` if cells a and b are equal, folding in fixed values
+        if fixed[a] is not None and fixed[b] is not None:
+            sweep.x(flag)
+        elif fixed[a] is not None:
+            comparator_equal_const(sweep, cells[b], fixed[a], flag, k)
+        elif fixed[b] is not None:
+            comparator_equal_const(sweep, cells[a], fixed[b], flag, k)
+        else:
+            comparator_equal(sweep, cells[a], cells[b], flag, k)
+
+    if live_pairs:
+        pairs = [(a, b) for a in range(L-1) for b in range(a+1, L) if can_repeat(a, b)]
+        if not pairs:
+            return None
+
+        # Compute every pair equality once, keeping all of them live
+        for flag, (a, b) in zip(flags, pairs):
+            pair_equal(a, b, flag)
+        num_line_flags = len(pairs)
+    else:
+        flag1, flag2 = flags[:L], flags[L:]
+
+        # Compute equality flags for each pair (a, b)
+        for a in range(L-1):
+            partners = [b for b in range(a+1, L) if can_repeat(a, b)]
+            if not partners:
+                continue  # flag1[a] stays |0>
+
+            for b in partners:
+                # Flip flag2[b-1] if the two cells are equal
+                pair_equal(a, b, flag2[b-1])
+
+            # OR the pair-wise flags into a cell-level flag
+            or_into(sweep, [flag2[b-1] for b in partners], flag1[a], anc)
+
+            # Uncompute pair flags to reset ancillas
+            for b in partners:
+                pair_equal(a, b, flag2[b-1])
+        num_line_flags = L
+
+    return sweep, sweep.inverse(), num_line_flags
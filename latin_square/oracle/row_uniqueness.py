@@ -1,9 +1,8 @@
-import sys, os
-sys.path.append(os.path.dirname(os.getcwd()))
-from utils.helpers import comparator_equal
+from utils.helpers import or_into
 from utils.indexer import Indexer
+from oracle.pair_flags import line_pair_flags
 
-from math import ceil, log2
+from typing import Optional, Sequence
 from qiskit import QuantumCircuit, QuantumRegister
 from qiskit.circuit import Qubit
 
@@ -16,7 +15,8 @@ def row_pair_flags(
     flag2: QuantumRegister,
     rflag: Qubit,
     idx: Indexer,
-    row: int
+    row: int,
+    pair_flags: Optional[Sequence[Qubit]] = None
 ):
     """
     For a single row `row`, compare every pair of columns (c1 < c2).
@@ -26,58 +26,27 @@ def row_pair_flags(
     Parameters:
         qc:     The QuantumCircuit to modify.
         data:   QuantumRegister holding the grid data (n * m * k qubits).
-        anc:    QuantumRegister providing k scratch qubits for XNOR operations.
+        anc:    Clean work qubits for the ORs (up to two are used; may be empty).
         flag1:  QuantumRegister of length m for per-column OR results.
         flag2:  QuantumRegister of length m-1 for per-pair equality flags.
         rflag:  Single-qubit flag for any equality violation in this row.
         idx:    Indexer instance for qubit indexing and metadata.
         row:    Row index to check.
-    """
-    n, m, k = idx.n, idx.m, idx.k
+        pair_flags: Optional m*(m-1)/2 clean qubits. If given, all pair equalities
+                    are kept live at once and OR-ed straight into `rflag`, so each pair is
+                    compared twice instead of four times; flag1/flag2 are then unused.
 
-    # Validate ancilla register sizes
-    if len(anc) < k:
-        raise ValueError(f"anc register must have at least {k} qubits for scratch")
-    if len(flag1) < m:
-        raise ValueError(f"flag1 register must have at least {m} qubits for column flags")
-    if len(flag2) < m-1:
-        raise ValueError(f"flag2 register must have at least {m-1} qubits for pair flags")
-
-    # Compute equality flags for each column pair
-    for c1 in range(m-1):
-        for c2 in range(c1+1, m):
-            # Extract k-bit cell values for columns c1 and c2
-            q1 = [data[idx.data(row, c1, b)] for b in range(k)]
-            q2 = [data[idx.data(row, c2, b)] for b in range(k)]
-            # Flip flag2[c2-1] if q1 == q2
-            comparator_equal(qc, q1, q2, anc, flag2[c2-1], k)
-
-        # OR the pair-wise flags into a column-level flag
-        qc.mcx(flag2, flag1[c1], ctrl_state='0'*(m-1))  # multi-control on all zeros
-        qc.x(flag1[c1])  # record if any equality occurred
-
-        # Uncompute pair flags to reset ancillas
-        for c2 in range(c1+1, m):
-            q1 = [data[idx.data(row, c1, b)] for b in range(k)]
-            q2 = [data[idx.data(row, c2, b)] for b in range(k)]
-            comparator_equal(qc, q1, q2, anc, flag2[c2-1], k)
-
-    # OR all column-level flags into the row-level violation flag
-    qc.mcx(flag1, rflag, ctrl_state='0'*m)
-    qc.x(rflag)
-
-    # Final cleanup: uncompute all intermediate flags
-    for c1 in range(m-1):
-        for c2 in range(c1+1, m):
-            q1 = [data[idx.data(row, c1, b)] for b in range(k)]
-            q2 = [data[idx.data(row, c2, b)] for b in range(k)]
-            comparator_equal(qc, q1, q2, anc, flag2[c2-1], k)
-        qc.mcx(flag2, flag1[c1], ctrl_state='0'*(m-1))
-        qc.x(flag1[c1])
-        for c2 in range(c1+1, m):
-            q1 = [data[idx.data(row, c1, b)] for b in range(k)]
-            q2 = [data[idx.data(row, c2, b)] for b in range(k)]
-            comparator_equal(qc, q1, q2, anc, flag2[c2-1], k)
+    Pre-filled cells are classical constants and are folded in at build time:
+    two fixed cells are compared classically (equal sets the pair flag with an X,
+    different drops the pair), and a fixed cell against a blank one is compared
+    against the fixed value's bits without touching the fixed cell's qubits.
+
+    Delegates to `line_pair_flags` on the cells of row `row`.
+    """
+    k = idx.k
+    cell_qubits = idx.cell_qubit_table()
+    cells = [[data[q] for q in cell] for cell in cell_qubits[row]]
+    line_pair_flags(qc, cells, anc, flag1, flag2, rflag, k, idx.grid[row], pair_flags)
 
 
 def row_uniqueness_circuit(
@@ -101,35 +70,41 @@ def row_uniqueness_circuit(
     n, m, k = idx.n, idx.m, idx.k
 
     # Reserve ancillas and flags from the Indexer
-    comp_anc_inds = idx.reserve_ancilla(k)
-    comp_anc = [qr[i] for i in comp_anc_inds]
+    row_flag_inds = idx.reserve_ancilla(n)
+    row_flags = [qr[i] for i in row_flag_inds]
 
-    flag1_inds = idx.reserve_ancilla(m)
+    # Keep all pair flags live if the pool has room, or fall back to
+    # the flag1/flag2 scheme, which recomputes the pairs to save ancillas
+    num_pairs = m*(m-1)//2
+    live_pairs = idx.free_ancilla() >= num_pairs
+    pair_flag_inds = idx.reserve_ancilla(num_pairs) if live_pairs else []
+    flag1_inds = [] if live_pairs else idx.reserve_ancilla(m)
+    flag2_inds = [] if live_pairs else idx.reserve_ancilla(m-1)
+    pair_flags = [qr[i] for i in pair_flag_inds] if live_pairs else None
     flag1 = [qr[i] for i in flag1_inds]
-
-    flag2_inds = idx.reserve_ancilla(m-1)
     flag2 = [qr[i] for i in flag2_inds]
 
-    row_flag_inds = idx.reserve_ancilla(n)
-    row_flags = [qr[i] for i in row_flag_inds]
+    # Clean work qubits for the ORs, if any are left in the pool
+    work_inds = idx.reserve_ancilla(min(2, idx.free_ancilla()))
+    work = [qr[i] for i in work_inds]
 
     final_flag = qr[idx.row_flag()]
 
     # First pass: compute each per-row violation flag
     for i in range(n):
         row_pair_flags(
-            qc, qr, comp_anc, flag1, flag2, row_flags[i], idx, i
+            qc, qr, work, flag1, flag2, row_flags[i], idx, i, pair_flags
         )
 
-    # Aggregate per-row flags into the final flag
-    qc.mcx(row_flags, final_flag, ctrl_state='0'*n)
-    qc.x(final_flag)
+    # Aggregate per-row flags into the final flag; every other
+    # reserved qubit is back in |0> here and can serve as a clean work qubit
+    or_into(qc, row_flags, final_flag, work + (pair_flags or []) + flag1 + flag2)
 
     # Second pass: uncompute per-row flags to release ancillas
     for i in range(n):
         row_pair_flags(
-            qc, qr, comp_anc, flag1, flag2, row_flags[i], idx, i
+            qc, qr, work, flag1, flag2, row_flags[i], idx, i, pair_flags
         )
 
     # Release all borrowed ancillas
-    idx.release_ancilla(comp_anc_inds + flag1_inds + flag2_inds + row_flag_inds)
\ No newline at end of file
+    idx.release_ancillas(work_inds + row_flag_inds + pair_flag_inds + flag1_inds + flag2_inds)
\ No newline at end of file
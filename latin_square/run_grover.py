@@ -11,7 +11,6 @@ import sys, os
 sys.path.append(os.path.dirname(__file__))
 
 from typing import List, Optional
-from math import ceil, log2
 from utils.grid import pretty_print_grids
 from grover.circuit import create_circuit
 from grover.algorithm import implement_grover
@@ -23,8 +22,9 @@ from utils.plotting import plot_grid_counts_histogram
 def run_grover(
     grid: List[List[Optional[int]]],
     num_solutions: int,
-    sim_type: str = "statevector",
-    shots: int = 1024
+    sim_type: str = "matrix_product_state",
+    shots: int = 1024,
+    max_bond_dimension: Optional[int] = None
 ) -> None:
     """
     Execute the full Grover-based search on a given partially filled grid.
@@ -39,6 +39,8 @@ def run_grover(
         AerSimulator method, by default "matrix_product_state".
     shots : int, optional
         Number of simulation shots, by default 1024.
+    max_bond_dimension : int, optional
+        Cap on the MPS bond dimension (approximate simulation), by default None.
 
     Prints
     ------
@@ -52,7 +54,7 @@ def run_grover(
     # Derive dimensions
     n = len(grid)
     m = len(grid[0]) if n > 0 else 0
-    k = ceil(log2(max(n,m)))
+    k = max((max(n, m) - 1).bit_length(), 1)
 
     # 1) Display the input grid
     flat = tuple(x for row in grid for x in row)
@@ -73,12 +75,14 @@ def run_grover(
     # 4) Append Grover iterations
     implement_grover(qc, qr, idx, r)
     # Resource metrics: report qubit count, circuit depth, and total gates
+    # (expand the Grover power, its steps and the oracles so the metrics count their contents)
+    flat_qc = qc.decompose(gates_to_decompose=["grover", "grover_step", "phase_oracle", "oracle"], reps=4)
     print(f"Total qubits used: {qc.num_qubits}")
-    print(f"Circuit depth: {qc.depth()}")
-    print(f"Total gates: {qc.size()}\n")
+    print(f"Circuit depth: {flat_qc.depth()}")
+    print(f"Total gates: {flat_qc.size()}\n")
 
     # 5) Simulate and collect raw counts
-    raw_counts = simulate_counts(qc, sim_type, shots)
+    raw_counts = simulate_counts(qc, sim_type, shots, max_bond_dimension=max_bond_dimension)
 
     # 6) Aggregate counts by final grid configurations
     grid_counts = extract_grid_counts(raw_counts, idx)
@@ -7,6 +7,8 @@ Utility functions for Latin-square grids:
 """
 from typing import List, Optional, Tuple, Dict
 
+import numpy as np
+
 
 def verify_grid(
     grid: List[List[Optional[int]]],
@@ -41,26 +43,24 @@ def verify_grid(
         if len(row) != m:
             raise ValueError(f"Row {i} has length {len(row)}, expected {m}")
 
-    # Check cell values and row duplicates
-    for i, row in enumerate(grid):
-        seen_row = set()
-        for j, v in enumerate(row):
-            if v is not None:
-                if not (0 <= v < symbol_max):
-                    raise ValueError(f"Cell ({i},{j}) has invalid symbol {v}")
-                if v in seen_row:
-                    raise ValueError(f"Row {i} has duplicate symbol {v}")
-                seen_row.add(v)
-
-    # Check column duplicates
-    for j in range(m):
-        seen_col = set()
-        for i in range(n):
-            v = grid[i][j]
-            if v is not None:
-                if v in seen_col:
-                    raise ValueError(f"Column {j} has duplicate symbol {v}")
-                seen_col.add(v)
+    # One int array plus a blank mask; blanks never count as symbols
+    blank = np.array([[v is None for v in row] for row in grid], dtype=bool).reshape(n, m)
+    arr = np.array([[0 if v is None else v for v in row] for row in grid], dtype=np.int64).reshape(n, m)
+
+    # Check cell values and row duplicates, reporting the first offence in row-major order
+    bad_value = ~blank & ((arr < 0) | (arr >= symbol_max))
+    row_dup = _repeats(arr, blank)
+    if bad_value.any() or row_dup.any():
+        i, j = np.argwhere(bad_value | row_dup)[0]
+        if bad_value[i, j]:
+            raise ValueError(f"Cell ({i},{j}) has invalid symbol {grid[i][j]}")
+        raise ValueError(f"Row {i} has duplicate symbol {grid[i][j]}")
+
+    # Check column duplicates, in column-major order
+    col_dup = _repeats(arr.T, blank.T)
+    if col_dup.any():
+        j, i = np.argwhere(col_dup)[0]
+        raise ValueError(f"Column {j} has duplicate symbol {grid[i][j]}")
 
     return True
 
@@ -78,24 +78,40 @@ def pretty_print_grids(
         n:       Number of rows in each grid.
         m:       Number of columns in each grid.
     """
-    def format_grid(state: Tuple[int, ...]) -> str:
-        # Break flat state into rows
-        rows = [state[i*m:(i+1)*m] for i in range(n)]
-        # Determine column width from the largest entry
-        col_width = max(len(str(x)) for row in rows for x in row) + 2
-        sep = "+" + "+".join("-" * col_width for _ in range(m)) + "+"
+    if not results:
+        return
+
+    # Column width and separator depend only on the widest entry over all
+    # grids, so they are computed once for the whole table
+    col_width = max(len(str(x)) for state in results for x in state) + 2
+    sep = "+" + "+".join("-" * col_width for _ in range(m)) + "+"
 
+    def format_grid(state: Tuple[int, ...]) -> str:
         lines = [sep]
-        for row in rows:
-            line = "|"
-            for x in row:
-                line += str(x).center(col_width) + "|"
-            lines.append(line)
+        for i in range(n):
+            # Break flat state into rows
+            row = state[i*m:(i+1)*m]
+            lines.append("|" + "|".join(str(x).center(col_width) for x in row) + "|")
             lines.append(sep)
         return "\n".join(lines)
 
-    # Display each grid and its count
-    for state, count in results.items():
-        print(f"Count = {count}")
-        print(format_grid(state))
-        print()
+    # Display each grid and its count in a single write
+    print("\n".join(f"Count = {count}\n{format_grid(state)}\n" for state, count in results.items()))
+
+
+def _repeats(arr: np.ndarray, blank: np.ndarray) -> np.ndarray:
+    """
+    Mask of the non-blank entries that repeat an earlier entry of their row.
+    A stable sort keeps equal values in column order, so every entry equal
+    to its sorted predecessor is a later occurrence.
+    """
+    # Send blanks past every symbol so they sort last and never match
+    keyed = np.where(blank, np.iinfo(np.int64).max, arr)
+    order = np.argsort(keyed, axis=1, kind="stable")
+    ranked = np.take_along_axis(keyed, order, axis=1)
+    ranked_blank = np.take_along_axis(blank, order, axis=1)
+    hit = np.zeros_like(blank)
+    hit[:, 1:] = (ranked[:, 1:] == ranked[:, :-1]) & ~ranked_blank[:, 1:]
+    out = np.zeros_like(blank)
+    np.put_along_axis(out, order, hit, axis=1)
+    return out
@@ -1,65 +1,186 @@
 """
 Helper routines and “quantum macros” for building and composing small Qiskit circuits.
-Includes ancilla preparation, comparators, and context-manager utilities.
+Includes comparators, equality checks, and multi-controlled OR macros.
 """
 
-import math
-from typing import List, Iterable, Sequence, Optional, Tuple
+from functools import lru_cache
+from typing import List, Sequence
 
-from qiskit import QuantumCircuit, QuantumRegister
-from qiskit.circuit import Qubit
-from qiskit.circuit.library import CDKMRippleCarryAdder
+from qiskit import QuantumCircuit
+from qiskit.circuit import CircuitInstruction, Gate, Qubit
+from qiskit.circuit.library import MCXGate, XGate
+from qiskit.synthesis import (
+    synth_integer_comparator_2s, synth_mcx_1_clean_kg24, synth_mcx_2_clean_kg24
+)
 
 
-def prepare_ancilla_cell_validity(qc: QuantumCircuit, anc: QuantumRegister, n: int, k: int) -> None:
+@lru_cache(maxsize=None)
+def _geq_gate(k: int, value: int) -> Gate:
     """
-    Initialize ancillas such that anc[0..k-1] store the bitwise representation of (2**k - n),
-    and anc[k], anc[k+1] remain in |0⟩.
+    Two's-complement comparator on k data qubits, a result qubit and k-1 clean
+    ancillas, flipping the result if the data register ≥ `value`; built once
+    per (width, constant).
     """
-    const = (1 << k) - n
-    for i in range(k):
-        if (const >> i) & 1:
-            qc.x(anc[i])
+    return synth_integer_comparator_2s(k, value, geq=True).to_gate(label=f"GEQ{value}")
 
 
-def comparator_less(
+def comparator_geq_const(
     qc: QuantumCircuit,
     dataQ: Sequence[Qubit],
-    anc: Sequence[Qubit],
+    value: int,
     target: Qubit,
+    anc: Sequence[Qubit],
     k: int
 ) -> None:
     """
-    Compare dataQ (k qubits) against a stored constant in anc[0..k-1], flipping `target` if dataQ ≥ n.
-    Uses CDKM ripple-carry adder: computes sum+carry, copies overflow, then uncomputes.
+    Flip `target` if the k-qubit register dataQ ≥ the classical `value`.
+    The constant is compiled into the comparator, so no constant register is
+    prepared; `anc` supplies k-1 clean qubits, which are returned to |0⟩.
     """
-    gate = CDKMRippleCarryAdder(k, kind="half").to_gate(label="ADD")
-    qubits = list(dataQ) + list(anc)
-    qc.append(gate, qubits)
-    qc.cx(anc[k], target)
-    qc.append(gate.inverse(), qubits)
+    gate = _geq_gate(k, value)
+    num_anc = gate.num_qubits - k - 1
+    if len(anc) < num_anc:
+        raise ValueError(f"comparator_geq_const needs {num_anc} clean ancillas, got {len(anc)}")
+    qc.append(gate, list(dataQ[:k]) + [target] + list(anc[:num_anc]))
+
+
+# Shared X instance for the hot macros below, which append through
+# QuantumCircuit._append: their qubits are valid by construction, so the
+# per-call argument broadcasting and checks of qc.x/qc.mcx are skipped
+_X = XGate()
+
+
+@lru_cache(maxsize=None)
+def _mcx(num_controls: int) -> Gate:
+    """Plain MCX gate instance, shared per number of controls."""
+    return MCXGate(num_controls)
+
+
+def mcx_all_zero(
+    qc: QuantumCircuit,
+    controls: Sequence[Qubit],
+    target: Qubit
+) -> None:
+    """
+    Flip `target` if all `controls` are |0⟩.
+    Written as X gates around a plain MCX rather than ctrl_state='0'*n, so the
+    transpiler sees an ordinary MCXGate and can pick its best synthesis plugin.
+    """
+    controls = tuple(controls)
+    for q in controls:
+        qc._append(CircuitInstruction(_X, (q,), ()))
+    qc._append(CircuitInstruction(_mcx(len(controls)), controls + (target,), ()))
+    for q in controls:
+        qc._append(CircuitInstruction(_X, (q,), ()))
 
 
 def comparator_equal(
     qc: QuantumCircuit,
     q1: List[Qubit],
     q2: List[Qubit],
-    anc: List[Qubit],
     target: Qubit,
     k: int
 ) -> None:
     """
     Flip `target` if and only if the two k-qubit registers q1 and q2 are equal.
-    Implements bitwise XNOR into anc[0..k-1], then an MCX, then uncomputes.
+    XORs q1 into q2 in place, so q2 is all-zero exactly on equality, fires an
+    all-zero-controlled MCX, then restores q2. Needs no ancillas.
+    Appended as one gate, cached per width.
+    """
+    qubits = tuple(q1[:k]) + tuple(q2[:k]) + (target,)
+    qc._append(CircuitInstruction(_eq_gate(k), qubits, ()))
+
+
+@lru_cache(maxsize=None)
+def _eq_gate(k: int) -> Gate:
+    """Equality test of `comparator_equal` on (q1, q2, target), built once per width."""
+    circ = QuantumCircuit(2*k + 1, name="eq")
+    q1, q2, target = circ.qubits[:k], circ.qubits[k:2*k], circ.qubits[2*k]
+    # The k CXs act on disjoint pairs, so each fan is one broadcast call
+    circ.cx(q1, q2)
+    mcx_all_zero(circ, q2, target)
+    circ.cx(q1, q2)
+    return circ.to_gate(label=f"EQ{k}")
+
+
+def comparator_equal_const(
+    qc: QuantumCircuit,
+    q: List[Qubit],
+    value: int,
+    target: Qubit,
+    k: int
+) -> None:
+    """
+    Flip `target` if and only if the k-qubit register q holds the classical `value`.
+    The constant is folded into the controls: only the bits where `value` is 0
+    get an X around the MCX, so no second register and no CX gates are needed.
     """
-    for i in range(k):
-        qc.cx(q1[i], anc[i])
-        qc.cx(q2[i], anc[i])
-        qc.x(anc[i])
+    zeros = tuple(q[i] for i in range(k) if not (value >> i) & 1)
+    for b in zeros:
+        qc._append(CircuitInstruction(_X, (b,), ()))
+    qc._append(CircuitInstruction(_mcx(k), tuple(q[:k]) + (target,), ()))
+    for b in zeros:
+        qc._append(CircuitInstruction(_X, (b,), ()))
 
-    qc.mcx(anc[:k], target)
 
-    for i in reversed(range(k)):
-        qc.x(anc[i])
-        qc.cx(q2[i], anc[i])
-        qc.cx(q1[i], anc[i])
+_CLEAN_MCX = {1: synth_mcx_1_clean_kg24, 2: synth_mcx_2_clean_kg24}
+
+# From this many controls, an OR given n-2 clean ancillas is built as a
+# Toffoli tree: same CX count as the 2-ancilla synthesis, but lower depth
+OR_TREE_MIN_CONTROLS = 6
+
+
+@lru_cache(maxsize=None)
+def _or_gate(num_controls: int, num_clean: int = 0) -> Gate:
+    """
+    Build (once per arity) the OR gate: an all-zero-controlled MCX followed
+    by an X on the target, i.e. target ^= c_0 OR ... OR c_{n-1}.
+    With `num_clean` (1 or 2) clean ancillas appended after the target, the MCX
+    uses the Khattar-Gidney synthesis (linear CX count, logarithmic depth for 2).
+    With num_controls - 2 clean ancillas, it is a balanced tree of relative-phase
+    Toffolis that is uncomputed after the root Toffoli.
+    """
+    circ = QuantumCircuit(num_controls + 1 + num_clean, name="or")
+    controls = list(range(num_controls))
+    if num_clean > 2:
+        circ.x(controls)
+        level, free, nodes = controls, iter(range(num_controls + 1, circ.num_qubits)), []
+        while len(level) > 2:
+            pairs = [(level[i], level[i + 1], next(free)) for i in range(0, len(level) - 1, 2)]
+            nodes += pairs
+            level = [t for _, _, t in pairs] + level[len(pairs) * 2:]
+        for c1, c2, t in nodes:
+            circ.rccx(c1, c2, t)
+        circ.ccx(level[0], level[1], num_controls)
+        for c1, c2, t in reversed(nodes):
+            circ.rccx(c1, c2, t)
+        circ.x(controls)
+    elif num_clean:
+        circ.x(controls)
+        circ.compose(_CLEAN_MCX[num_clean](num_controls), inplace=True)
+        circ.x(controls)
+    else:
+        mcx_all_zero(circ, circ.qubits[:num_controls], circ.qubits[num_controls])
+    circ.x(num_controls)
+    return circ.to_gate(label=f"OR{num_controls}")
+
+
+def or_into(
+    qc: QuantumCircuit,
+    controls: Sequence[Qubit],
+    target: Qubit,
+    ancillas: Sequence[Qubit] = ()
+) -> None:
+    """
+    Flip `target` if any of the `controls` qubits is |1⟩.
+    Appended as a single cached gate, so repeated ORs of the same width share one definition.
+    Given ancillas must be |0⟩ and are returned to |0⟩: up to two are used as clean work
+    qubits for ORs of three or more controls, or len(controls) - 2 for a Toffoli tree
+    once there are OR_TREE_MIN_CONTROLS controls.
+    """
+    n = len(controls)
+    if n >= OR_TREE_MIN_CONTROLS and len(ancillas) >= n - 2:
+        work = list(ancillas[:n - 2])
+    else:
+        work = list(ancillas[:2]) if n > 2 else []
+    qc._append(CircuitInstruction(_or_gate(n, len(work)), (*controls, target, *work), ()))
@@ -5,9 +5,10 @@ Provides the Indexer class for flat-index management of an n*m grid
 encoded into qubits, plus ancilla tracking and convenience methods.
 """
 
-import math
-from typing import List, Sequence, Optional
+from collections import deque
+from typing import List, Sequence, Optional, Tuple
 
+import numpy as np
 from qiskit import QuantumCircuit
 
 
@@ -18,6 +19,16 @@ class Indexer:
       • row-, col-, cell-validity, and global flags
       • a pool of ancilla qubits
     """
+    # Fixed attribute set: no per-instance __dict__, and slot-based lookups
+    # for the fields read in the oracle build loops
+    __slots__ = (
+        "n", "m", "k", "grid", "num_anc",
+        "_base_data", "_base_row_flag", "_base_col_flag", "_base_cell_flag",
+        "_index_global", "_base_ancilla",
+        "_ancilla_free", "_ancilla_free_set", "_total_qubits",
+        "_grid_arr", "_cell_qubits", "_data_qubits", "_blank_qubits", "_x_qubits",
+    )
+
     def __init__(
         self,
         grid: Sequence[Sequence[Optional[int]]],
@@ -38,8 +49,9 @@ class Indexer:
             raise ValueError("grid must have at least one row")
         self.m = len(grid[0])           # number of columns
 
-        # bit-width to encode symbols 0..max(n,m)-1
-        self.k = math.ceil(math.log2(max(self.n, self.m)))
+        # bit-width to encode symbols 0..max(n,m)-1 (at least one bit), in
+        # exact integer arithmetic
+        self.k = max((max(self.n, self.m) - 1).bit_length(), 1)
 
         # validate rectangular shape
         lengths = [len(r) for r in grid]
@@ -59,13 +71,34 @@ class Indexer:
         self._index_global    = self._base_cell_flag + 1
         self._base_ancilla    = self._index_global + 1
 
-        # ancilla bookkeeping
-        self._ancilla_free = list(range(
+        # ancilla bookkeeping: a FIFO queue of free indices
+        self._ancilla_free = deque(range(
             self._base_ancilla,
             self._base_ancilla + self.num_anc
         ))
+        # same pool as a set, for O(1) double-release checks
+        self._ancilla_free_set = set(self._ancilla_free)
         self._total_qubits = self._base_ancilla + self.num_anc
 
+        # grid as an int array with -1 for blanks, plus the qubit index of
+        # every cell bit; the initialisation plan below is derived from both
+        # with whole-array NumPy operations
+        self._grid_arr = np.array(
+            [[-1 if v is None else v for v in row] for row in grid],
+            dtype=np.int64,
+        ).reshape(self.n, self.m)
+        cell_idx = self._base_data + np.arange(len_data, dtype=np.int64).reshape(
+            self.n, self.m, self.k
+        )
+
+        # cached qubit indices: per cell, all data bits, blank-cell bits and
+        # the set bits of the fixed values
+        self._cell_qubits = tuple(
+            tuple(tuple(cell) for cell in row) for row in cell_idx.tolist()
+        )
+        self._data_qubits = tuple(range(self._base_data, self._base_data + len_data))
+        self._blank_qubits, self._x_qubits = self._init_plan(cell_idx)
+
     # ──────────────── data-qubit helpers ────────────────── #
 
     def prepare_cell(self, qc: QuantumCircuit, i: int, j: int):
@@ -84,10 +117,15 @@ class Indexer:
                     qc.x(q)
 
     def initialize_grid(self, qc: QuantumCircuit):
-        """Apply prepare_cell to every (i,j) in the grid."""
-        for i in range(self.n):
-            for j in range(self.m):
-                self.prepare_cell(qc, i, j)
+        """
+        Prepare every cell as prepare_cell would, batched into a single
+        H call on all blank-cell qubits and a single X call on the set bits
+        of all fixed values. Both qubit lists are computed once in __init__.
+        """
+        if self._blank_qubits:
+            qc.h(list(self._blank_qubits))
+        if self._x_qubits:
+            qc.x(list(self._x_qubits))
 
     # ────────────────── flat-index accessors ─────────────────── #
 
@@ -97,11 +135,25 @@ class Indexer:
         self._chk_bit(bit)
         return (i * self.m + j) * self.k + bit + self._base_data
 
-    def cell_qubits(self, i: int, j: int) -> List[int]:
+    def cell_qubits(self, i: int, j: int) -> Tuple[int, ...]:
         """Return the k contiguous qubit indices for cell (i,j)."""
         self._chk_cell(i, j)
-        base = (i * self.m + j) * self.k + self._base_data
-        return list(range(base, base + self.k))
+        return self._cell_qubits[i][j]
+
+    def cell_qubit_table(self) -> Tuple[Tuple[Tuple[int, ...], ...], ...]:
+        """
+        Return the cached per-cell qubit indices, indexed as [i][j], without
+        bounds checks; meant for hot loops that visit many cells.
+        """
+        return self._cell_qubits
+
+    def data_qubits(self) -> Tuple[int, ...]:
+        """Return the qubit indices of every data bit, in row-major cell order."""
+        return self._data_qubits
+
+    def blank_qubits(self) -> Tuple[int, ...]:
+        """Return the qubit indices of the data bits of blank (None) cells."""
+        return self._blank_qubits
 
     # ─────────── constraint-flag indices ──────────────── #
 
@@ -123,19 +175,34 @@ class Indexer:
             raise RuntimeError(
                 f"Requested {n} ancillas, but only {len(self._ancilla_free)} available."
             )
-        out, self._ancilla_free = self._ancilla_free[:n], self._ancilla_free[n:]
+        popleft = self._ancilla_free.popleft
+        out = [popleft() for _ in range(n)]
+        self._ancilla_free_set.difference_update(out)
         return out
 
     def release_ancilla(self, qubits: int | List[int]):
-        """Return previously reserved ancillas back to the pool."""
+        """
+        Return previously reserved ancillas back to the pool; accepts a single
+        index or a list. Kept for compatibility: callers holding a list of
+        indices can call `release_ancillas` directly.
+        """
         if isinstance(qubits, int):
             qubits = [qubits]
+        self.release_ancillas(qubits)
+
+    def release_ancillas(self, qubits: Sequence[int]):
+        """Return a batch of previously reserved ancillas back to the pool."""
         for q in qubits:
             if q < self._base_ancilla or q >= self._total_qubits:
                 raise ValueError(f"Qubit {q} is not managed by this Indexer.")
-            if q in self._ancilla_free:
+            if q in self._ancilla_free_set:
                 raise ValueError(f"Ancilla {q} already free.")
             self._ancilla_free.append(q)
+            self._ancilla_free_set.add(q)
+
+    def free_ancilla(self) -> int:
+        """Number of ancillas currently available for `reserve_ancilla`."""
+        return len(self._ancilla_free)
 
     # ────────────── diagnostics & pretty-printing ─────────── #
 
@@ -159,6 +226,17 @@ class Indexer:
 
     # ───────────────────────── internals ────────────────────────── #
 
+    def _init_plan(self, cell_idx: np.ndarray) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """
+        Qubit indices for initialize_grid, both in row-major order: every bit
+        of the blank cells (H targets) and every set bit of the fixed values
+        (X targets), computed with NumPy bit shifts over the whole grid at once.
+        """
+        vals = self._grid_arr[..., None]
+        blank = np.broadcast_to(vals < 0, cell_idx.shape)
+        set_bits = (vals >= 0) & (((vals >> np.arange(self.k)) & 1) == 1)
+        return tuple(cell_idx[blank].tolist()), tuple(cell_idx[set_bits].tolist())
+
     def _chk_cell(self, i: int, j: int):
         """Raise if (i,j) is out of the grid bounds."""
         if not (0 <= i < self.n and 0 <= j < self.m):
@@ -23,15 +23,11 @@ def plot_grid_counts_histogram(
         n:           Number of rows.
         m:           Number of columns.
     """
-    # Prepare labels and values
-    labels = []
-    values = []
-    for grid, count in grid_counts.items():
-        # Build one-line label: 'r0; r1; ...'
-        row_strs = [','.join(str(grid[i*m + j]) for j in range(m)) for i in range(n)]
-        label = '|'.join(row_strs)
-        labels.append(label)
-        values.append(count)
+    # Prepare labels and values: one format template for the one-line label
+    # 'a,b|c,d|...', filled with each flat grid in a single call
+    template = '|'.join([','.join(['{}'] * m)] * n)
+    labels = [template.format(*grid) for grid in grid_counts]
+    values = list(grid_counts.values())
 
     # Plot histogram
     plt.figure()